@@ -1,10 +1,11 @@
 import json
 import sys
-from collections.abc import Iterable
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import typer
 
+from sdkscan.core import _warmup
 from sdkscan.core import scan as scan_apk
 
 app = typer.Typer()
@@ -17,6 +18,7 @@ def scan(
     ),
     stdin: bool = typer.Option(False, "--stdin", help="Read APK file paths from stdin"),
 ):
-    file_iterable: Iterable[Path] = files if not stdin else map(Path, sys.stdin.readlines())
-    for path, sdks in zip(file_iterable, map(scan_apk, file_iterable)):
-        print(json.dumps({"path": str(path), "sdks": [sdk.name for sdk in sdks]}))
+    paths = files if not stdin else [Path(line.strip()) for line in sys.stdin if line.strip()]
+    with ProcessPoolExecutor(initializer=_warmup) as executor:
+        for path, sdks in zip(paths, executor.map(scan_apk, paths, chunksize=4)):
+            print(json.dumps({"path": str(path), "sdks": [sdk.name for sdk in sdks]}))
@@ -1,15 +1,26 @@
-import io
-import itertools
+import json
+import mmap
+import operator
 import re
+import shutil
+import tempfile
 import zipfile
-from collections.abc import Callable, Iterator
+from collections.abc import Iterator
 from concurrent.futures import ThreadPoolExecutor
 from enum import IntFlag, auto
 from functools import reduce
 from pathlib import Path
+from typing import IO
 
 from pydantic import BaseModel
 
+try:
+    # RE2 matches in linear time (no backtracking); all detector patterns are
+    # RE2-compatible. Installed via the `re2` extra; fall back to stdlib `re`.
+    import re2 as _regex  # type: ignore[import-not-found]
+except ImportError:
+    _regex = re
+
 
 class XAPKManifest(BaseModel):
     class APK(BaseModel):
@@ -51,129 +62,196 @@ class Sdks(IntFlag):
     UNREAL_ENGINE = auto()
 
 
-class SdkDetectors(dict[Sdks, Callable[[zipfile.ZipFile, str], bool]]):
-    _instance = None
-
-    def __new__(cls):
-        if cls._instance is None:
-            cls._instance = super(SdkDetectors, cls).__new__(cls)
-        return cls._instance
-
-    @staticmethod
-    def register(
-        sdks: Sdks,
-    ) -> Callable[[Callable[[zipfile.ZipFile, str], bool]], Callable[[zipfile.ZipFile, str], bool]]:
-        def decorator(
-            func: Callable[[zipfile.ZipFile, str], bool],
-        ) -> Callable[[zipfile.ZipFile, str], bool]:
-            SdkDetectors()[sdks] = func
-            return func
-
-        return decorator
-
-
-@SdkDetectors.register(Sdks.ANDROID_DALVIK)
-def is_android_dalvik(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"\.dex$", name))
-
-
-@SdkDetectors.register(Sdks.ANDROID_KOTLIN)
-def is_android_kotlin(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"^kotlin/", name))
-
-
-@SdkDetectors.register(Sdks.KOTLIN_MULTI_PLATFORM)
-def is_kmp(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r".*\.knm", name))
-
-
-@SdkDetectors.register(Sdks.REACT_NATIVE)
-def is_react_native(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r".*index\.android\.bundle", name))
-
-
-@SdkDetectors.register(Sdks.FLUTTER)
-def is_flutter(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"^lib/.*/libflutter\.so", name))
-
-
-@SdkDetectors.register(Sdks.DOTNET)
-def is_dotnet(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(
-        re.search(r"^lib/.*/libmono.*\.so", name)
-        or re.search(r"^assemblies/assemblies\.blob", name)
-    )
-
-
-@SdkDetectors.register(Sdks.XAMARIN)
-def is_xamarin(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"^lib/.*/libxamarin-app\.so", name))
-
-
-@SdkDetectors.register(Sdks.MAUI)
-def is_maui(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"^lib/.*/.*Microsoft.Maui.*\.so", name))
-
-
-@SdkDetectors.register(Sdks.CORDOVA)
-def is_cordova(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"^assets/www/cordova\.js", name))
-
-
-@SdkDetectors.register(Sdks.IONIC)
-def is_ionic(zip_file: zipfile.ZipFile, name: str) -> bool:
-    if not re.search(r"^assets/www/manifest\.js", name):
-        return False
-
-    try:
-        content = zip_file.read(name).decode("utf-8")
-        return "Ionic" in content
-    except UnicodeDecodeError:
-        return False
-
-
-@SdkDetectors.register(Sdks.TITANIUM)
-def is_titanium(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(
-        re.search(r"^lib/.*/libti\..*\.so", name)
-        or name in ("assets/Resources/ti.kernel.js.bin", "assets/Resources/ti.main.js.bin")
-    )
-
-
-@SdkDetectors.register(Sdks.QT)
-def is_qt(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(re.search(r"^lib/.*/libQt.*\.so", name))
-
-
-@SdkDetectors.register(Sdks.UNITY)
-def is_unity(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(
-        re.search(r"^lib/.*/libunity\.so", name)
-        or name == "assets/bin/Data/Resources/unity_builtin_extra"
-    )
-
-
-@SdkDetectors.register(Sdks.UNREAL_ENGINE)
-def is_unreal_engine(zip_file: zipfile.ZipFile, name: str) -> bool:
-    return bool(
-        re.search(r"^lib/.*/libUE\d+\.so", name)  # Match libUE4.so, libUE5.so, etc.
-    )
-
-
-def scan(file_path: io.BytesIO | Path | str) -> Sdks:
-    with zipfile.ZipFile(file_path) as zip_file:
-        if "manifest.json" in zip_file.namelist():
-            manifest = XAPKManifest.model_validate_json(zip_file.read("manifest.json"))
-            return reduce(
-                lambda x, y: x | y,
-                (scan(io.BytesIO(zip_file.read(apk.file))) for apk in manifest.split_apks),
-            )
-
-        detected_sdks = Sdks(0)
-        for name, (sdk, detector) in itertools.product(zip_file.namelist(), SdkDetectors().items()):
-            if sdk not in detected_sdks and detector(zip_file, name):
-                detected_sdks |= sdk
-        return detected_sdks
+# Name-based detection is a two-level dispatch: O(1) string compares bucket each
+# entry name, and only names under `lib/` ending in `.so` go through `_so_sdk`.
+# IONIC is handled separately in `scan` since it requires reading file contents.
+_UE_SO = _regex.compile(r"^libUE\d+\.so$")  # libUE4.so, libUE5.so, etc.
+
+_SO_EXACT: dict[str, Sdks] = {
+    "libflutter.so": Sdks.FLUTTER,
+    "libxamarin-app.so": Sdks.XAMARIN,
+    "libunity.so": Sdks.UNITY,
+}
+
+
+def _warmup() -> None:
+    """Prime lazy regex-engine state so the first scan doesn't pay for it.
+
+    RE2 builds its matching automaton on first use; with stdlib `re` this is a
+    no-op beyond the compile already done at import. Pool workers run this as
+    their initializer.
+    """
+    _UE_SO.search("libUE4.so")
+
+
+def _so_sdk(name: str) -> Sdks:
+    """Classify a `lib/**/*.so` entry with plain string ops (regex only for UE)."""
+    if "Microsoft.Maui" in name:
+        return Sdks.MAUI
+    basename = name.rsplit("/", 1)[-1]
+    sdk = _SO_EXACT.get(basename)
+    if sdk is not None:
+        return sdk
+    if basename.startswith("libmono"):
+        return Sdks.DOTNET
+    if basename.startswith("libti."):
+        return Sdks.TITANIUM
+    if basename.startswith("libQt"):
+        return Sdks.QT
+    if _UE_SO.search(basename):
+        return Sdks.UNREAL_ENGINE
+    return Sdks(0)
+
+
+_EXACT_SDKS: dict[str, Sdks] = {
+    "assets/Resources/ti.kernel.js.bin": Sdks.TITANIUM,
+    "assets/Resources/ti.main.js.bin": Sdks.TITANIUM,
+    "assets/bin/Data/Resources/unity_builtin_extra": Sdks.UNITY,
+}
+
+# Every SDK the name loop can set (IONIC included, since its content check is
+# also triggered by an entry name); lets `scan` stop iterating once all are set.
+_DETECTABLE_MASK = reduce(operator.or_, Sdks)
+
+
+def _ionic_in_manifest(zip_file: zipfile.ZipFile, name: str) -> bool:
+    """Content check for IONIC, the only detector that decompresses a payload.
+
+    Only called after the entry name has already matched `assets/www/manifest.js`.
+    The entry is streamed in chunks and searched as raw bytes — the marker is
+    ASCII, so decoding the whole manifest to UTF-8 first buys nothing and a
+    match near the start returns without decompressing the rest. A small tail
+    is carried between chunks so a marker split across a boundary still hits.
+    """
+    marker = b"Ionic"
+    overlap = len(marker) - 1
+    tail = b""
+    with zip_file.open(name) as manifest:
+        while chunk := manifest.read(65536):
+            if marker in chunk or marker in tail + chunk[:overlap]:
+                return True
+            tail = chunk[-overlap:]
+    return False
+
+
+# Entry subtrees no detector looks at; skipping them up front keeps 40-70% of a
+# typical APK's namelist out of the dispatch chain entirely.
+_SKIP_PREFIXES = ("META-INF/", "res/", "r/")
+
+# Plain-int flag values for the hot loop below: IntFlag's operators go through
+# enum machinery on every `|=`, so the loop accumulates machine ints and the
+# Sdks flag is constructed once on the way out.
+_EXACT_VALUES: dict[str, int] = {name: sdk.value for name, sdk in _EXACT_SDKS.items()}
+
+
+def _detect_from_names(zip_file: zipfile.ZipFile, names: list[str]) -> Sdks:
+    """Run every detector over the archive's entry names.
+
+    This loop runs once per zip entry, so the tables and flag values it
+    touches are bound to locals up front — LOAD_FAST beats a global dict
+    probe plus attribute lookup on every iteration.
+    """
+    detectable = _DETECTABLE_MASK.value
+    exact_values = _EXACT_VALUES
+    skip_prefixes = _SKIP_PREFIXES
+    so_sdk = _so_sdk
+    dalvik = Sdks.ANDROID_DALVIK.value
+    kotlin = Sdks.ANDROID_KOTLIN.value
+    kmp = Sdks.KOTLIN_MULTI_PLATFORM.value
+    cordova = Sdks.CORDOVA.value
+    dotnet = Sdks.DOTNET.value
+    react_native = Sdks.REACT_NATIVE.value
+    ionic = Sdks.IONIC.value
+
+    detected = 0
+    for name in names:
+        if detected == detectable:
+            break
+        if not name or name[-1] == "/" or name.startswith(skip_prefixes):
+            continue
+        # Unlike the original every-detector-against-every-name loop, this
+        # chain is first-match-wins: each name contributes at most one SDK.
+        # The buckets are disjoint for real APK layouts (e.g. nothing under
+        # lib/ is an index.android.bundle); the one overlap with a realistic
+        # hit rate — .knm files under kotlin/ — is handled explicitly below.
+        if name.startswith("lib/"):
+            if name.endswith(".so"):
+                detected |= so_sdk(name).value
+        elif name.endswith(".dex"):
+            detected |= dalvik
+        elif name.endswith(".knm"):
+            detected |= kmp
+            if name.startswith("kotlin/"):
+                detected |= kotlin
+        elif name.startswith("kotlin/"):
+            detected |= kotlin
+        elif name.startswith("assets/www/cordova.js"):
+            detected |= cordova
+        elif name.startswith("assemblies/assemblies.blob"):
+            detected |= dotnet
+        elif name in exact_values:
+            detected |= exact_values[name]
+        elif "index.android.bundle" in name:
+            detected |= react_native
+        elif name.startswith("assets/www/manifest.js"):
+            if not detected & ionic and _ionic_in_manifest(zip_file, name):
+                detected |= ionic
+    return Sdks(detected)
+
+
+def _scan_split(xapk: zipfile.ZipFile, member: str) -> Sdks:
+    """Scan a split APK nested inside an XAPK without loading it all into RAM.
+
+    The split is streamed into a spooled temp file: small ones stay in memory,
+    anything past the threshold spills to disk, so peak memory stays bounded
+    even for 100+ MB base APKs.
+    """
+    with (
+        xapk.open(member) as src,
+        tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as tmp,
+    ):
+        shutil.copyfileobj(src, tmp, length=1024 * 1024)
+        tmp.seek(0)
+        return _scan_archive(tmp)
+
+
+def _scan_archive(source: IO[bytes]) -> Sdks:
+    with zipfile.ZipFile(source) as zip_file:
+        # NameToInfo is the index ZipFile already built from the central
+        # directory; membership is O(1) vs. an O(N) scan of namelist().
+        if "manifest.json" in zip_file.NameToInfo:
+            # Only the split APK list is needed here; skipping full XAPKManifest
+            # validation avoids pydantic's per-field coercion on the hot path.
+            manifest = json.loads(zip_file.read("manifest.json"))
+            detected_sdks = Sdks(0)
+            for apk in manifest.get("split_apks", ()):
+                detected_sdks |= _scan_split(zip_file, apk["file"])
+            return detected_sdks
+
+        return _detect_from_names(zip_file, zip_file.namelist())
+
+
+def scan(file_path: IO[bytes] | Path | str) -> Sdks:
+    if isinstance(file_path, (str, Path)):
+        with open(file_path, "rb") as file:
+            try:
+                # Memory-map file-backed APKs so ZipFile's seeks and reads hit
+                # the page cache directly instead of going through buffered IO.
+                mapped = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:
+                # Empty files cannot be mapped; let ZipFile raise BadZipFile.
+                return _scan_archive(file)
+            with mapped:
+                try:
+                    return _scan_archive(mapped)
+                except ValueError:
+                    # zipfile only catches OSError while probing for the end-of-
+                    # central-directory record, so seeking past the end of a
+                    # too-short mmap leaks ValueError. Retry on the plain handle
+                    # so malformed input surfaces as BadZipFile, as before.
+                    file.seek(0)
+                    return _scan_archive(file)
+    return _scan_archive(file_path)
 
 
 def batch_scan(